@@ -1,17 +1,31 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path, PureWindowsPath
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
+import orjson
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+# Optional: query the HNSW sidecar written by vectordb/build_chroma_openai.py
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
 
 from collections import defaultdict
 
@@ -24,11 +38,27 @@ EMBED_MODEL = os.getenv("EMBEDDINGS_MODEL_NAME", "text-embedding-3-small").strip
 
 CHROMA_DIR = PROJECT_ROOT / "chroma_db"
 COLLECTION_NAME = "ayurveda_docs"
+SIDECAR_DIR = CHROMA_DIR / "hnsw_sidecar"
+
+# "hnsw" = query the sidecar index when present, "chroma" = always use col.query
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "hnsw").strip().lower()
+# filtered sidecar queries up to this many chunks use the exact int8 scan,
+# whose best RERANK_K candidates are re-scored with the float vectors
+EXACT_SCAN_MAX = int(os.getenv("EXACT_SCAN_MAX", "50000"))
+RERANK_K = int(os.getenv("RERANK_K", "50"))
 
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY missing in .env")
 
-oaiclient = OpenAI(api_key=OPENAI_API_KEY)
+oaiclient = AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+# Cap in-flight OpenAI calls across all concurrent requests
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+_openai_sem = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+# Chat gets its own cap: a streamed answer holds its slot until the client has
+# read the last token, and slow readers mustn't stall query embeddings
+OPENAI_MAX_CHAT_CONCURRENCY = int(os.getenv("OPENAI_MAX_CHAT_CONCURRENCY", "8"))
+_chat_sem = asyncio.Semaphore(OPENAI_MAX_CHAT_CONCURRENCY)
 
 # Hard disable telemetry noise
 os.environ["ANONYMIZED_TELEMETRY"] = "0"
@@ -42,7 +72,149 @@ col = chroma.get_collection(COLLECTION_NAME)
 print("✅ CHROMA_DIR =", CHROMA_DIR)
 print("✅ Existing collections =", [c.name for c in chroma.list_collections()])
 print("✅ Using collection =", COLLECTION_NAME)
-print("✅ Collection count =", col.count())
+# col.count() isn't free on big collections; monitoring endpoints share a TTL'd value
+COUNT_TTL_S = 30.0
+_COUNT_CACHE: Dict[str, Any] = {"n": None, "ts": 0.0}
+
+
+def fast_count(ttl: float = COUNT_TTL_S) -> int:
+    now = time.monotonic()
+    if _COUNT_CACHE["n"] is None or now - _COUNT_CACHE["ts"] >= ttl:
+        _COUNT_CACHE["n"] = col.count()
+        _COUNT_CACHE["ts"] = now
+    return _COUNT_CACHE["n"]
+
+
+print("✅ Collection count =", fast_count())
+
+# /ask always embeds with OpenAI; vectors from another backend aren't comparable
+_built_with = (col.metadata or {}).get("embed_model")
+if _built_with and _built_with != EMBED_MODEL:
+    print(f"⚠️ Collection was embedded with {_built_with!r} but queries use {EMBED_MODEL!r}; rebuild or set EMBEDDINGS_MODEL_NAME")
+
+# query vectors must have the collection's (possibly shortened) dimensions
+EMBED_DIMENSIONS: Optional[int] = (col.metadata or {}).get("embed_dimensions")
+EMBED_KWARGS: Dict[str, Any] = {"dimensions": int(EMBED_DIMENSIONS)} if EMBED_DIMENSIONS else {}
+
+
+class HnswReader:
+    """
+    Read-only vector search over the HNSW sidecar (index.bin + chunks.json).
+    Loaded once at startup; skips Chroma's Python query path entirely.
+    Distances are cosine distances, same as the Chroma collection.
+
+    Filtered queries (source / doc_ids) over at most EXACT_SCAN_MAX chunks are
+    answered by an exact scan of the int8 vectors (vectors_i8.npy) instead of
+    an HNSW walk with a per-candidate Python filter. The int8 scores only pick
+    candidates; the top RERANK_K are re-ranked with the float vectors held by
+    the HNSW index, so returned order and distances are exact.
+    """
+
+    def __init__(self, sidecar_dir: Path, expected_dim: Optional[int] = None):
+        data = orjson.loads((sidecar_dir / "chunks.json").read_bytes())
+        if expected_dim and int(data["dim"]) != int(expected_dim):
+            # left over from an older (or interrupted) build
+            raise ValueError(f"sidecar has dim={data['dim']}, collection uses {expected_dim}")
+        self.ids: List[str] = data["ids"]
+        self.documents: List[str] = data["documents"]
+        self.metadatas: List[Dict[str, Any]] = data["metadatas"]
+
+        self.index = hnswlib.Index(space="cosine", dim=int(data["dim"]))
+        self.index.load_index(str(sidecar_dir / "index.bin"), max_elements=len(self.ids))
+        self.index.set_ef(128)
+
+        # int8 copy (optional: older sidecars don't have it); mmap keeps RSS low
+        self.q8: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        if (sidecar_dir / "vectors_i8.npy").exists():
+            self.q8 = np.load(sidecar_dir / "vectors_i8.npy", mmap_mode="r")
+            self.scales = np.load(sidecar_dir / "scales.npy")
+
+        # label sets for metadata filters
+        self.by_source: Dict[str, set] = defaultdict(set)
+        self.by_doc: Dict[str, set] = defaultdict(set)
+        for i, m in enumerate(self.metadatas):
+            m = m or {}
+            self.by_source[str(m.get("source") or "")].add(i)
+            self.by_doc[str(m.get("doc_id") or "")].add(i)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query(
+        self,
+        q_emb: List[float],
+        top_k: int,
+        source_filter: Optional[str],
+        doc_ids: Optional[List[str]],
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
+        allowed: Optional[set] = None
+        if source_filter:
+            allowed = self.by_source.get(source_filter, set())
+        if doc_ids:
+            in_docs = set().union(*(self.by_doc.get(d, set()) for d in doc_ids))
+            allowed = in_docs if allowed is None else allowed & in_docs
+
+        k = min(int(top_k), len(self.ids) if allowed is None else len(allowed))
+        if k <= 0:
+            return [], [], []
+
+        if allowed is not None and self.q8 is not None and len(allowed) <= EXACT_SCAN_MAX:
+            rows, _ = self._scan_int8(q_emb, np.fromiter(allowed, dtype=np.int64), max(k, RERANK_K))
+            rows, dists = self._rerank(q_emb, rows, k)
+            return (
+                [self.documents[i] for i in rows],
+                [self.metadatas[i] for i in rows],
+                dists,
+            )
+
+        q = np.asarray([q_emb], dtype=np.float32)
+        if allowed is None:
+            labels, dists = self.index.knn_query(q, k=k)
+        else:
+            labels, dists = self.index.knn_query(q, k=k, filter=allowed.__contains__)
+
+        rows = [int(x) for x in labels[0]]
+        return (
+            [self.documents[i] for i in rows],
+            [self.metadatas[i] for i in rows],
+            [float(d) for d in dists[0]],
+        )
+
+
+    def _scan_int8(self, q_emb: List[float], rows: np.ndarray, k: int) -> Tuple[List[int], List[float]]:
+        q = np.asarray(q_emb, dtype=np.float32)
+        q /= max(float(np.linalg.norm(q)), 1e-12)
+        q_scale = max(float(np.abs(q).max()) / 127.0, 1e-12)
+        q8 = np.round(q / q_scale).astype(np.int32)  # int32 accumulators
+
+        rows.sort()  # sequential reads from the mmap
+        sims = (self.q8[rows] @ q8) * (self.scales[rows] * q_scale)
+
+        top = np.argpartition(-sims, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [int(rows[i]) for i in top], [float(1.0 - sims[i]) for i in top]
+
+    def _rerank(self, q_emb: List[float], rows: List[int], k: int) -> Tuple[List[int], List[float]]:
+        # cosine space: hnswlib stores unit vectors, so get_items() + dot == cosine
+        vecs = np.asarray(self.index.get_items(rows), dtype=np.float32)
+        q = np.asarray(q_emb, dtype=np.float32)
+        q /= max(float(np.linalg.norm(q)), 1e-12)
+        sims = vecs @ q
+        top = np.argsort(-sims, kind="stable")[:k]
+        return [rows[i] for i in top], [float(1.0 - sims[i]) for i in top]
+
+
+hnsw: Optional[HnswReader] = None
+if VECTOR_BACKEND == "hnsw" and hnswlib is not None and (SIDECAR_DIR / "index.bin").exists():
+    try:
+        hnsw = HnswReader(SIDECAR_DIR, EMBED_DIMENSIONS)
+    except ValueError as e:
+        print(f"⚠️ Ignoring stale HNSW sidecar ({e}); rebuild with build_chroma_openai.py")
+if hnsw is not None:
+    print("✅ HNSW sidecar =", SIDECAR_DIR, f"({len(hnsw)} vectors)")
+else:
+    print("✅ Vector search via Chroma (no HNSW sidecar)")
 
 # ✅ IMPORTANT: app must exist BEFORE any @app.get/@app.post
 app = FastAPI(title="Ayurveda RAG")
@@ -81,7 +253,10 @@ class AskRequest(BaseModel):
     strict: bool = True
 
 
-class Citation(BaseModel):
+# Plain slotted dataclass: built per retrieved chunk, serialized straight by orjson
+# (no pydantic validation on the hot path)
+@dataclass(slots=True)
+class Citation:
     source: str
     title: str
     file_name: str
@@ -98,19 +273,182 @@ class AskResponse(BaseModel):
     retrieved_count: int
 
 
-def embed_query(q: str) -> List[float]:
-    resp = oaiclient.embeddings.create(model=EMBED_MODEL, input=[q])
-    return resp.data[0].embedding
+class EmbedCache:
+    """
+    Small LRU with per-entry TTL for query embeddings.
+    (functools.lru_cache can't wrap coroutines, so we keep our own.)
+    """
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, Tuple[float, Tuple[float, ...]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[float, ...]]:
+        item = self._data.get(key)
+        if item is None or time.monotonic() - item[0] > self.ttl_s:
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: str, value: Tuple[float, ...]) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def cache_info(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "maxsize": self.maxsize,
+            "currsize": len(self._data),
+            "ttl_s": self.ttl_s,
+        }
+
+
+# Query embedding cache: repeated questions skip the OpenAI round-trip.
+_embed_cache = EmbedCache(maxsize=1024, ttl_s=600.0)
+
+
+class QueryResultCache:
+    """
+    Semantic cache for retrieve(): a new query whose embedding has cosine >= min_sim
+    with a cached one (same filters / top_k) reuses that query's contexts.
+    Embeddings live in one preallocated (max_size, dim) matrix, so a lookup
+    is a single mat-vec; eviction replaces the oldest slot. Thread-safe.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl_s: float = 300.0, min_sim: float = 0.97):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.min_sim = min_sim
+        self._lock = threading.RLock()
+        self._mat: Optional[np.ndarray] = None          # (max_size, dim), unit rows
+        self._ts = np.full(max_size, -np.inf)           # insert time; -inf = empty slot
+        self._sigs: List[Optional[str]] = [None] * max_size
+        self._results: List[Any] = [None] * max_size
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(emb: List[float]) -> np.ndarray:
+        v = np.asarray(emb, dtype=np.float32)
+        n = float(np.linalg.norm(v))
+        return v / n if n else v
+
+    def get(self, emb: List[float], sig: str) -> Optional[Any]:
+        with self._lock:
+            if self._mat is None or self._mat.shape[1] != len(emb):
+                self.misses += 1
+                return None
+            now = time.monotonic()
+            live = self._ts > now - self.ttl_s
+            live &= np.fromiter((x == sig for x in self._sigs), dtype=bool, count=self.max_size)
+            if not live.any():
+                self.misses += 1
+                return None
+            sims = self._mat @ self._unit(emb)
+            sims[~live] = -1.0
+            best = int(np.argmax(sims))
+            if sims[best] < self.min_sim:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._results[best]
+
+    def put(self, emb: List[float], sig: str, result: Any) -> None:
+        with self._lock:
+            if self._mat is None or self._mat.shape[1] != len(emb):
+                # first entry (or embedding model changed): (re)allocate
+                self._mat = np.zeros((self.max_size, len(emb)), dtype=np.float32)
+                self._ts[:] = -np.inf
+            slot = int(np.argmin(self._ts))  # empty slot first, else the oldest
+            self._mat[slot] = self._unit(emb)
+            self._ts[slot] = time.monotonic()
+            self._sigs[slot] = sig
+            self._results[slot] = result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "size": int(np.isfinite(self._ts).sum()),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl_s,
+                "min_sim": self.min_sim,
+            }
+
+
+# Near-duplicate questions skip the vector search entirely
+_result_cache = QueryResultCache()
+
+
+def _normalize_query(q: str) -> str:
+    return " ".join((q or "").split()).lower()
 
 
-def retrieve(
+async def embed_queries(qs: List[str]) -> List[List[float]]:
+    """
+    Embed many queries with at most one API call:
+    cache hits are served locally, all misses go out in a single batched request.
+    The normalized query is only the cache key; the text embedded is the first
+    original query seen for that key (case can matter, e.g. "WHO" vs "who").
+    """
+    norm = [_normalize_query(q) for q in qs]
+    found: Dict[str, Tuple[float, ...]] = {}
+    misses: Dict[str, str] = {}  # normalized -> original text to embed
+    for q, nq in zip(qs, norm):
+        if nq in found or nq in misses:
+            continue
+        cached = _embed_cache.get(nq)
+        if cached is not None:
+            found[nq] = cached
+        else:
+            misses[nq] = q
+
+    if misses:
+        async with _openai_sem:
+            resp = await oaiclient.embeddings.create(
+                model=EMBED_MODEL, input=list(misses.values()), **EMBED_KWARGS
+            )
+        for nq, d in zip(misses, resp.data):
+            emb = tuple(d.embedding)
+            _embed_cache.put(nq, emb)
+            found[nq] = emb
+
+    return [list(found[nq]) for nq in norm]
+
+
+async def embed_query(q: str) -> List[float]:
+    return (await embed_queries([q]))[0]
+
+
+embed_query.cache_info = _embed_cache.cache_info  # type: ignore[attr-defined]
+
+
+async def retrieve(
     question: str,
     top_k: int,
     source_filter: Optional[str],
     doc_ids: Optional[List[str]],
 ) -> List[Dict[str, Any]]:
 
-    q_emb = embed_query(question)
+    q_emb = await embed_query(question)
+
+    filter_sig = f"{source_filter or ''}|{','.join(sorted(doc_ids or []))}|{int(top_k)}"
+    cached = _result_cache.get(q_emb, filter_sig)
+    if cached is not None:
+        return cached
 
     where: Dict[str, Any] = {}
 
@@ -122,16 +460,22 @@ def retrieve(
     if doc_ids:
         where["doc_id"] = {"$in": doc_ids}
 
-    res = col.query(
-        query_embeddings=[q_emb],
-        n_results=int(top_k),
-        include=["documents", "metadatas", "distances"],
-        where=where if where else None,  # IMPORTANT
-    )
+    if hnsw is not None:
+        # hnswlib releases the GIL during search
+        docs, metas, dists = await asyncio.to_thread(hnsw.query, q_emb, top_k, source_filter, doc_ids)
+    else:
+        # Chroma is sync; keep it off the event loop
+        res = await asyncio.to_thread(
+            col.query,
+            query_embeddings=[q_emb],
+            n_results=int(top_k),
+            include=["documents", "metadatas", "distances"],
+            where=where if where else None,  # IMPORTANT
+        )
 
-    docs = (res.get("documents") or [[]])[0]
-    metas = (res.get("metadatas") or [[]])[0]
-    dists = (res.get("distances") or [[]])[0]
+        docs = (res.get("documents") or [[]])[0]
+        metas = (res.get("metadatas") or [[]])[0]
+        dists = (res.get("distances") or [[]])[0]
 
     out: List[Dict[str, Any]] = []
     for d, m, dist in zip(docs, metas, dists):
@@ -139,6 +483,7 @@ def retrieve(
             continue
         out.append({"text": d, "meta": m or {}, "distance": dist})
 
+    _result_cache.put(q_emb, filter_sig, out)
     return out
 
 
@@ -171,18 +516,20 @@ def build_prompt(question: str, contexts: List[Dict[str, Any]], strict: bool) ->
 
 
 @app.get("/debug_query")
-def debug_query(
+async def debug_query(
     q: str = Query(..., min_length=2),
     top_k: int = 5,
     source: str | None = None,
 ):
-    emb = embed_query(q)
+    # embedding and count are independent: run them together
+    emb, count = await asyncio.gather(embed_query(q), asyncio.to_thread(fast_count))
 
     kwargs: Dict[str, Any] = {}
     if source:
         kwargs["where"] = {"source": source}
 
-    res = col.query(
+    res = await asyncio.to_thread(
+        col.query,
         query_embeddings=[emb],
         n_results=int(top_k),
         include=["documents", "metadatas", "distances"],
@@ -194,7 +541,7 @@ def debug_query(
     dists0 = (res.get("distances") or [[]])[0]
 
     return {
-        "collection_count": col.count(),
+        "collection_count": count,
         "query_len": len(q),
         "emb_dim": len(emb),
         "top_k": top_k,
@@ -209,34 +556,10 @@ def debug_query(
     }
 
 
-@app.post("/ask", response_model=AskResponse)
-def ask(req: AskRequest) -> AskResponse:
-    contexts = retrieve(
-        question=req.question,
-        top_k=req.top_k,
-        source_filter=req.source_filter,
-        doc_ids=req.doc_ids,
-    )
-
-    if not contexts:
-        return AskResponse(
-            answer="I don’t have enough information in the provided documents to answer this.",
-            citations=[],
-            retrieved_count=0,
-        )
-
-    prompt = build_prompt(req.question, contexts, req.strict)
+NO_ANSWER = "I don’t have enough information in the provided documents to answer this."
 
-    completion = oaiclient.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a careful RAG assistant."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-    )
-    answer = completion.choices[0].message.content.strip()
 
+def build_citations(contexts: List[Dict[str, Any]]) -> List[Citation]:
     citations: List[Citation] = []
     for c in contexts:
         m = c["meta"] or {}
@@ -252,8 +575,89 @@ def ask(req: AskRequest) -> AskResponse:
                 chunk_id=str(m.get("chunk_id") or "")
             )
         )
+    return citations
+
 
-    return AskResponse(answer=answer, citations=citations, retrieved_count=len(contexts))
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@app.post("/ask", response_model=AskResponse)
+async def ask(req: AskRequest, stream: bool = Query(True)):
+    """
+    Default: Server-Sent Events
+      event: citations  -> {"citations": [...], "retrieved_count": n}  (sent first)
+      event: token      -> {"text": "..."}                              (one per delta)
+      event: error      -> {"message": "..."}                           (answer is incomplete)
+      event: done       -> {}                                           (always last)
+    ?stream=0 returns a plain AskResponse JSON for programmatic callers.
+    """
+    contexts = await retrieve(
+        question=req.question,
+        top_k=req.top_k,
+        source_filter=req.source_filter,
+        doc_ids=req.doc_ids,
+    )
+    citations = build_citations(contexts)
+
+    if not contexts:
+        if not stream:
+            return ORJSONResponse({"answer": NO_ANSWER, "citations": [], "retrieved_count": 0})
+
+        async def empty_events():
+            yield sse_event("citations", {"citations": [], "retrieved_count": 0})
+            yield sse_event("token", {"text": NO_ANSWER})
+            yield sse_event("done", {})
+
+        return StreamingResponse(empty_events(), media_type="text/event-stream")
+
+    prompt = build_prompt(req.question, contexts, req.strict)
+    messages = [
+        {"role": "system", "content": "You are a careful RAG assistant."},
+        {"role": "user", "content": prompt},
+    ]
+
+    if not stream:
+        async with _chat_sem:
+            completion = await oaiclient.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                temperature=0.2,
+            )
+        answer = completion.choices[0].message.content.strip()
+        # AskResponse shape; returned directly so FastAPI skips re-validating citations
+        return ORJSONResponse(
+            {"answer": answer, "citations": citations, "retrieved_count": len(contexts)}
+        )
+
+    async def events():
+        # citations go out before the first token so the UI can render them immediately
+        yield sse_event("citations", {"citations": citations, "retrieved_count": len(contexts)})
+        try:
+            async with _chat_sem:
+                completion = await oaiclient.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=messages,
+                    temperature=0.2,
+                    stream=True,
+                )
+                async for chunk in completion:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield sse_event("token", {"text": delta})
+        except Exception as e:
+            # headers are already sent; tell the client the answer is incomplete
+            print(f"⚠️ /ask stream failed: {e!r}")
+            yield sse_event("error", {"message": f"{type(e).__name__}: {e}"})
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/health")
@@ -262,9 +666,13 @@ def health():
         "chroma_dir": str(CHROMA_DIR),
         "collections": [c.name for c in chroma.list_collections()],
         "collection": COLLECTION_NAME,
-        "count": col.count(),
+        "count": fast_count(),
         "embed_model": EMBED_MODEL,
+        "embed_dimensions": EMBED_DIMENSIONS,
         "chat_model": OPENAI_MODEL,
+        "embed_cache": embed_query.cache_info(),
+        "vector_backend": "hnsw" if hnsw is not None else "chroma",
+        "result_cache": _result_cache.stats(),
     }
 
 
@@ -272,45 +680,133 @@ def health():
 def peek():
     got = col.get(limit=1, include=["documents", "metadatas"])
     return {
-        "count": col.count(),
+        "count": fast_count(),
         "sample_ids": got.get("ids", []),
         "sample_meta": (got.get("metadatas") or [None])[0],
         "sample_doc_preview": ((got.get("documents") or [""])[0] or "")[:300],
     }
 
-@app.get("/list_docs")
-def list_docs():
+# /list_docs is served from the ingest manifest (re-read when its mtime changes);
+# the Chroma scan below is only the fallback when the manifest is missing.
+MANIFEST_PATH = PROJECT_ROOT / "out" / "manifests" / "docs_manifest.json"
+REPORT_PATH = PROJECT_ROOT / "out" / "manifests" / "postprocess_report.json"
+_DOC_INDEX: Dict[str, Any] = {"key": None, "docs": None}
+
+# scan fallback cache; call invalidate_docs_cache() after (re)ingesting (also resets fast_count)
+DOCS_CACHE_TTL_S = 60.0
+DOCS_SCAN_PAGE = 1000
+_docs_cache: Dict[str, Any] = {"ts": 0.0, "value": None}
+
+
+def invalidate_docs_cache() -> None:
+    _docs_cache["ts"] = 0.0
+    _docs_cache["value"] = None
+    _DOC_INDEX["key"] = None
+    _DOC_INDEX["docs"] = None
+    _COUNT_CACHE["n"] = None
+
+
+def _doc_entry(doc_id: str, m: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "doc_id": doc_id,
+        "title": str(m.get("title") or ""),
+        "source": str(m.get("source") or ""),
+        "file_name": str(m.get("file_name") or ""),
+        "display_name": pretty_doc_label(m),
+    }
+
+
+def _sort_docs(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Sort nicely by source then title
+    docs.sort(key=lambda x: (x["source"], x["title"], x["file_name"]))
+    return docs
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_doc_index() -> Optional[List[Dict[str, Any]]]:
     """
-    Returns unique documents with a beautiful display name.
-    Uses Chroma metadata.
+    Docs from docs_manifest.json, with title/source taken from
+    postprocess_report.json (same values that end up in Chroma metadata).
+    Returns None if there is no manifest.
     """
-    # Pull all metadatas (fast enough for ~1k chunks)
-    got = col.get(include=["metadatas"], limit=col.count())
-    metas = got.get("metadatas") or []
+    key = (_mtime(MANIFEST_PATH), _mtime(REPORT_PATH))
+    if key[0] is None:
+        return None
+    if _DOC_INDEX["key"] == key:
+        return _DOC_INDEX["docs"]
+
+    try:
+        manifest = orjson.loads(MANIFEST_PATH.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+    # report rows point at the raw JSONL ("in"), whose stem is the doc_id;
+    # paths may have been written on Windows
+    cleaned: Dict[str, Dict[str, Any]] = {}
+    if key[1] is not None:
+        try:
+            for row in orjson.loads(REPORT_PATH.read_bytes()):
+                cleaned[PureWindowsPath(str(row.get("in") or "")).stem] = row
+        except (OSError, orjson.JSONDecodeError, AttributeError, TypeError):
+            cleaned = {}
 
-    by_doc: Dict[str, Dict[str, Any]] = {}
-    for m in metas:
-        if not m:
-            continue
-        doc_id = str(m.get("doc_id") or "").strip()
+    docs = []
+    for d in manifest.get("docs") or []:
+        doc_id = str(d.get("doc_id") or "").strip()
         if not doc_id:
             continue
-        # Keep first seen (good enough)
-        if doc_id not in by_doc:
-            by_doc[doc_id] = m
+        m = dict(d)
+        row = cleaned.get(doc_id)
+        if row:
+            m["title"] = row.get("title") or m.get("title")
+            m["source"] = row.get("source") or m.get("source")
+        docs.append(_doc_entry(doc_id, m))
 
-    docs = []
-    for doc_id, m in by_doc.items():
-        docs.append(
-            {
-                "doc_id": doc_id,
-                "title": str(m.get("title") or ""),
-                "source": str(m.get("source") or ""),
-                "file_name": str(m.get("file_name") or ""),
-                "display_name": pretty_doc_label(m),
-            }
-        )
+    _DOC_INDEX["key"] = key
+    _DOC_INDEX["docs"] = _sort_docs(docs)
+    return _DOC_INDEX["docs"]
 
-    # Sort nicely by source then title
-    docs.sort(key=lambda x: (x["source"], x["title"], x["file_name"]))
+
+def _scan_docs() -> List[Dict[str, Any]]:
+    now = time.monotonic()
+    if _docs_cache["value"] is not None and now - _docs_cache["ts"] < DOCS_CACHE_TTL_S:
+        return _docs_cache["value"]
+
+    # Page through metadatas only; keep first seen per doc (good enough)
+    by_doc: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    while True:
+        got = col.get(include=["metadatas"], limit=DOCS_SCAN_PAGE, offset=offset)
+        metas = got.get("metadatas") or []
+        for m in metas:
+            if not m:
+                continue
+            doc_id = str(m.get("doc_id") or "").strip()
+            if doc_id and doc_id not in by_doc:
+                by_doc[doc_id] = m
+        if len(metas) < DOCS_SCAN_PAGE:
+            break
+        offset += DOCS_SCAN_PAGE
+
+    docs = _sort_docs([_doc_entry(doc_id, m) for doc_id, m in by_doc.items()])
+    _docs_cache["ts"] = now
+    _docs_cache["value"] = docs
+    return docs
+
+
+@app.get("/list_docs")
+def list_docs():
+    """
+    Returns unique documents with a beautiful display name.
+    Uses the ingest manifest; falls back to scanning Chroma metadata.
+    """
+    docs = load_doc_index()
+    if docs is None:
+        docs = _scan_docs()
     return {"count": len(docs), "docs": docs}
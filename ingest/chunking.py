@@ -6,7 +6,7 @@ from typing import Dict, List, Tuple, Optional
 import re
 
 
-@dataclass
+@dataclass(slots=True)
 class Chunk:
     page_start: int
     page_end: int
@@ -29,15 +29,19 @@ FRONT_SPLIT_MARKERS = [
     "acknowledgments",
 ]
 
-FRONT_SPLIT_RE = re.compile(
-    r"^\s*("
-    + "|".join(re.escape(m) for m in FRONT_SPLIT_MARKERS)
-    + r")\s*$",
+# Line classifier for the block splitter (one fullmatch per line):
+# - toc: a TOC title alone on its line ("CONTENTS"); also a front marker
+# - front: any other front-matter marker alone on its line ("Preface")
+LINE_KIND_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<toc>contents|table of contents)|"
+    r"(?P<front>" + "|".join(re.escape(m) for m in FRONT_SPLIT_MARKERS) + r")"
+    r")\s*",
     re.IGNORECASE,
 )
+FRONT_KINDS = ("toc", "front")
 
-# Also split if line starts with "CONTENTS" and then a bunch of dotted leaders etc
-TOC_SIGNAL_RE = re.compile(r"^\s*(contents|table of contents)\s*$", re.IGNORECASE)
+# Also flag a TOC page if it has a bunch of dotted leaders etc
 TOC_LEADER_RE = re.compile(r"\.{3,}|(\bpage\b\s*\d+)", re.IGNORECASE)
 
 # Remove very common scanned page noise lines
@@ -47,6 +51,11 @@ NOISE_RE = re.compile(
 )
 
 
+def _line_kind(ln: str) -> Optional[str]:
+    m = LINE_KIND_RE.fullmatch(ln)
+    return m.lastgroup if m else None
+
+
 def _dedupe_adjacent(seq: List[str]) -> List[str]:
     out: List[str] = []
     for x in seq:
@@ -77,21 +86,22 @@ def _split_page_into_blocks(lines: List[str]) -> List[List[str]]:
 
     blocks: List[List[str]] = []
     cur: List[str] = []
+    kinds = [_line_kind(ln) for ln in lines]
 
     # Detect if page looks like a TOC page
     tocish = False
     leaders = 0
-    for ln in lines[:80]:
-        if TOC_SIGNAL_RE.match(ln):
+    for ln, kind in zip(lines[:80], kinds):
+        if kind == "toc":
             tocish = True
         if TOC_LEADER_RE.search(ln):
             leaders += 1
     if leaders >= 8:
         tocish = True
 
-    for ln in lines:
+    for ln, kind in zip(lines, kinds):
         # Hard split at front markers
-        if FRONT_SPLIT_RE.match(ln):
+        if kind in FRONT_KINDS:
             if cur:
                 blocks.append(cur)
                 cur = []
@@ -131,17 +141,19 @@ def build_chunks_from_pages(
     chunks: List[Chunk] = []
 
     cur_text_parts: List[str] = []
+    cur_len = 0  # == len("\n".join(cur_text_parts)), kept incrementally
     cur_start: Optional[int] = None
     cur_end: Optional[int] = None
     cur_section: List[str] = ["Document"]
 
     def flush():
-        nonlocal cur_text_parts, cur_start, cur_end, cur_section
+        nonlocal cur_text_parts, cur_len, cur_start, cur_end, cur_section
         if not cur_text_parts or cur_start is None or cur_end is None:
             return
         txt = "\n".join(cur_text_parts).strip()
         if not txt:
             cur_text_parts, cur_start, cur_end = [], None, None
+            cur_len = 0
             cur_section = ["Document"]
             return
         chunks.append(
@@ -153,8 +165,14 @@ def build_chunks_from_pages(
             )
         )
         cur_text_parts, cur_start, cur_end = [], None, None
+        cur_len = 0
         cur_section = ["Document"]
 
+    def add_part(part: str):
+        nonlocal cur_len
+        cur_len += len(part) + (1 if cur_text_parts else 0)
+        cur_text_parts.append(part)
+
     def start_new(pno: int):
         nonlocal cur_start, cur_end, cur_section
         cur_start = pno
@@ -186,7 +204,7 @@ def build_chunks_from_pages(
             bt_low = bt.strip().lower()
 
             # If this is a front marker alone ("Preface", "Contents"), it should start a fresh chunk.
-            is_front_marker = FRONT_SPLIT_RE.match(bt.strip()) is not None and len(bt.splitlines()) == 1
+            is_front_marker = "\n" not in bt and _line_kind(bt) in FRONT_KINDS
 
             # If we’re starting fresh
             if cur_start is None:
@@ -204,22 +222,22 @@ def build_chunks_from_pages(
                 if cur_text_parts:
                     flush()
                 start_new(pno)
-                cur_text_parts.append(bt)  # marker itself
+                add_part(bt)  # marker itself
                 cur_end = pno
                 flush()
                 continue
 
             # If adding this block exceeds size, flush before adding
-            current_len = sum(len(x) for x in cur_text_parts) + max(0, len(cur_text_parts) - 1)
-            if cur_text_parts and current_len + 1 + len(bt) > target_chars:
+            if cur_text_parts and cur_len + 1 + len(bt) > target_chars:
                 # flush and carry overlap
                 prev_txt = "\n".join(cur_text_parts)
                 flush()
                 start_new(pno)
-                cur_text_parts.extend(apply_overlap(prev_txt))
+                for part in apply_overlap(prev_txt):
+                    add_part(part)
 
             # Add block
-            cur_text_parts.append(bt)
+            add_part(bt)
             cur_end = pno
             cur_section = page_section  # always keep latest page section for the chunk
 
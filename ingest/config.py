@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 @dataclass(frozen=True)
 class ParseConfig:
@@ -16,3 +17,9 @@ class ParseConfig:
 
     # quality / safety
     drop_tiny_pages_below_chars: int = 30  # ignore near-empty pages (scans / blanks)
+    header_ratio: float = 0.05   # drop text blocks entirely in the top 5% of a page
+    footer_ratio: float = 0.05   # ... or entirely in the bottom 5%
+
+    # parallelism
+    max_workers: Optional[int] = None      # PDF worker processes (None = os.cpu_count())
+    page_workers: int = 1                  # extra processes per PDF for page ranges (1 = off)
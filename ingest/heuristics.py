@@ -4,6 +4,8 @@ from __future__ import annotations
 import re
 from typing import List
 
+from ingest.multiscan import build_scanner
+
 # Strong heading patterns (numbered sections and ALL CAPS report headers)
 NUM_HEADING_RE = re.compile(r"^\s*(\d+(\.\d+){0,6})\s+[A-Za-z].+")
 ALLCAPS_RE = re.compile(r"^[A-Z][A-Z0-9 \-&,()/]{6,}$")
@@ -51,6 +53,28 @@ SENTENCE_VERB_RE = re.compile(
     re.IGNORECASE,
 )
 
+# Fused scanners: one regex pass per line instead of one per pattern
+HEADING_REJECT_RE = re.compile(
+    f"(?P<bad>{BAD_HEADING_RE.pattern})|(?P<verb>{SENTENCE_VERB_RE.pattern})",
+    re.IGNORECASE,
+)
+HEADING_ACCEPT_RE = re.compile(
+    r"(?P<num>\s*(\d+(\.\d+){0,6})\s+[A-Za-z].+)|(?P<caps>[A-Z][A-Z0-9 \-&,()/]{6,})"
+)
+
+# Same four patterns as one Hyperscan database (None if hyperscan isn't installed)
+_HS_BAD, _HS_VERB, _HS_NUM, _HS_CAPS = range(4)
+_HS_REJECT = {_HS_BAD, _HS_VERB}
+_HS_ACCEPT = {_HS_NUM, _HS_CAPS}
+HEADING_SCANNER = build_scanner(
+    [
+        (BAD_HEADING_RE.pattern, True),
+        (SENTENCE_VERB_RE.pattern, True),
+        (NUM_HEADING_RE.pattern, False),
+        (ALLCAPS_RE.pattern, False),
+    ]
+)
+
 
 def infer_source(title: str) -> str:
     """
@@ -108,8 +132,14 @@ def looks_like_heading(line: str, min_len: int, max_len: int) -> bool:
     if low in FRONT_MATTER:
         return True
 
-    # Reject obvious bad heading candidates
-    if BAD_HEADING_RE.search(s):
+    fired = HEADING_SCANNER.scan(s) if HEADING_SCANNER is not None else None
+
+    # Reject obvious bad heading candidates (BAD_HEADING_RE)
+    # and sentence-like lines with common verbs (SENTENCE_VERB_RE) in one pass
+    if fired is not None:
+        if fired & _HS_REJECT:
+            return False
+    elif HEADING_REJECT_RE.search(s):
         return False
 
     # Reject if it looks like a normal sentence (GOAT filter)
@@ -117,10 +147,6 @@ def looks_like_heading(line: str, min_len: int, max_len: int) -> bool:
     if s.count(",") >= 2 and not s.isupper():
         return False
 
-    # Common verb words => usually sentence, not a heading
-    if SENTENCE_VERB_RE.search(low):
-        return False
-
     # Period-ending lines are almost never headings (except ALL CAPS)
     if s.endswith(".") and not s.isupper():
         return False
@@ -133,11 +159,10 @@ def looks_like_heading(line: str, min_len: int, max_len: int) -> bool:
     if s.endswith(",") and not s.isupper():
         return False
 
-    # Strong patterns
-    if NUM_HEADING_RE.match(s):
-        return True
-
-    if ALLCAPS_RE.match(s):
+    # Strong patterns: numbered (NUM_HEADING_RE) or ALL CAPS (ALLCAPS_RE)
+    if fired is not None:
+        return bool(fired & _HS_ACCEPT)
+    if HEADING_ACCEPT_RE.fullmatch(s):
         return True
 
     # Otherwise, be conservative
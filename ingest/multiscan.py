@@ -0,0 +1,96 @@
+# FILE: ingest/multiscan.py
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+# Optional: Hyperscan compiles many regexes into one automaton and scans a line once.
+# Without it, callers keep using their (fused) Python `re` patterns.
+try:
+    import hyperscan
+except ImportError:  # pragma: no cover - depends on environment
+    hyperscan = None
+
+# Compiled databases are cached next to the bytecode (like numba's cache=True),
+# so CLI runs and spawned workers load them instead of recompiling
+CACHE_DIR = Path(__file__).resolve().parent / "__pycache__"
+
+
+class MultiScanner:
+    """
+    Hyperscan multi-pattern matcher.
+    patterns: list of (regex, caseless); ids are the list positions.
+    scan(s) -> set of ids that matched anywhere in s (search semantics),
+    or None for non-ASCII lines (caller falls back to `re`).
+
+    Hyperscan has no Unicode-aware \b, so \s/\w/\b are ASCII-only here;
+    restricting it to ASCII lines keeps results identical to Python `re`.
+    """
+
+    def __init__(self, patterns: List[Tuple[str, bool]]):
+        base = hyperscan.HS_FLAG_SINGLEMATCH
+        expressions = [p.encode("utf-8") for p, _ in patterns]
+        flags = [base | (hyperscan.HS_FLAG_CASELESS if caseless else 0) for _, caseless in patterns]
+
+        key = hashlib.sha1(
+            repr((getattr(hyperscan, "__version__", ""), expressions, flags)).encode("utf-8")
+        ).hexdigest()[:16]
+        cache_path = CACHE_DIR / f"multiscan-{key}.hsdb"
+
+        self.db = _load_cached(cache_path)
+        if self.db is None:
+            self.db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            self.db.compile(
+                expressions=expressions,
+                ids=list(range(len(patterns))),
+                elements=len(patterns),
+                flags=flags,
+            )
+            _store_cached(cache_path, self.db)
+
+    def scan(self, s: str) -> Optional[Set[int]]:
+        if not s.isascii():
+            return None
+        data = s.encode("ascii")
+
+        fired: Set[int] = set()
+
+        def on_match(id_: int, _from: int, _to: int, _flags: int, _ctx: object) -> None:
+            fired.add(id_)
+
+        self.db.scan(data, match_event_handler=on_match)
+        return fired
+
+
+def _load_cached(path: Path):
+    try:
+        db = hyperscan.loadb(path.read_bytes(), hyperscan.HS_MODE_BLOCK)
+        db.scratch = hyperscan.Scratch(db)  # deserialized dbs come without scratch space
+        return db
+    except (OSError, hyperscan.error):
+        return None
+
+
+def _store_cached(path: Path, db) -> None:
+    # best effort: a read-only checkout just recompiles next time
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(hyperscan.dumpb(db))
+        os.replace(tmp, path)
+    except (OSError, hyperscan.error):
+        pass
+
+
+def build_scanner(patterns: List[Tuple[str, bool]]) -> Optional[MultiScanner]:
+    """
+    Returns None when hyperscan isn't installed or rejects a pattern.
+    """
+    if hyperscan is None:
+        return None
+    try:
+        return MultiScanner(patterns)
+    except hyperscan.error:
+        return None
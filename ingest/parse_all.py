@@ -1,12 +1,18 @@
 # FILE: ingest/parse_all.py
 from __future__ import annotations
 
-import json
+import argparse
 import hashlib
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from dataclasses import asdict
 from pathlib import Path
 from typing import Dict, List, Any, Tuple
 from datetime import datetime
 
+import orjson
 from tqdm import tqdm
 
 from ingest.config import ParseConfig
@@ -14,6 +20,12 @@ from ingest.pdf_text import extract_pdf_text
 from ingest.heuristics import looks_like_heading, infer_source, auto_tags
 from ingest.chunking import build_chunks_from_pages
 
+# Optional: xxh3 is ~10x faster than md5 for the unchanged-PDF check
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - depends on environment
+    xxhash = None
+
 
 def _doc_id_from_path(path: Path) -> str:
     h = hashlib.sha1(str(path).encode("utf-8")).hexdigest()[:10]
@@ -21,6 +33,37 @@ def _doc_id_from_path(path: Path) -> str:
     return f"{slug}_{h}"
 
 
+def _file_hash(path: Path) -> str:
+    # algorithm prefix so switching hashers invalidates old cache entries
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            data = b""
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if xxhash is not None:
+                return "xxh3:" + xxhash.xxh3_128(data).hexdigest()
+            return "md5:" + hashlib.md5(data).hexdigest()
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def _cfg_signature(cfg: ParseConfig) -> str:
+    # settings that change the JSONL output (paths / worker counts don't)
+    d = asdict(cfg)
+    for k in ("input_dir", "out_dir", "max_workers", "page_workers"):
+        d.pop(k, None)
+    return hashlib.sha1(orjson.dumps(d, option=orjson.OPT_SORT_KEYS)).hexdigest()[:12]
+
+
+def _load_ingest_cache(path: Path) -> Dict[str, Any]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+
+
 def _dedupe_adjacent(seq: List[str]) -> List[str]:
     out: List[str] = []
     for x in seq:
@@ -40,8 +83,10 @@ def _build_section_paths_strict_heading_only(
     - only accept headings via strict looks_like_heading()
     - stable depth up to 3: ["Document", H1] or ["Document", H1, H2]
     - dedupe adjacent repeats
+    Pages under the same section share one (read-only) path list.
     """
     section_by_page: Dict[int, List[str]] = {}
+    interned: Dict[Tuple[str, ...], List[str]] = {}
     current: List[str] = ["Document"]
 
     for pno in sorted(pages_text.keys()):
@@ -69,13 +114,98 @@ def _build_section_paths_strict_heading_only(
                 current = ["Document", current[1], heading_found]
 
             current = _dedupe_adjacent(current)
+            current = interned.setdefault(tuple(current), current)
 
-        section_by_page[pno] = current.copy()
+        section_by_page[pno] = current
 
     return section_by_page
 
 
-def parse_all_pdfs(cfg: ParseConfig) -> None:
+def _process_one_pdf(pdf_path: Path, cfg: ParseConfig) -> Dict[str, Any]:
+    """
+    Parse + chunk one PDF and write its JSONL.
+    Runs in a worker process; returns the manifest entry.
+    """
+    res = extract_pdf_text(
+        pdf_path,
+        header_ratio=cfg.header_ratio,
+        footer_ratio=cfg.footer_ratio,
+        page_workers=cfg.page_workers,
+    )
+    doc_id = _doc_id_from_path(pdf_path)
+    title = (res.title_guess or pdf_path.stem).strip()
+
+    pages: List[Tuple[int, str]] = [
+        (p.page_num, p.text)
+        for p in res.pages
+        if len((p.text or "").strip()) >= cfg.drop_tiny_pages_below_chars
+    ]
+    pages_text_map = {pno: txt for pno, txt in pages}
+
+    section_by_page = _build_section_paths_strict_heading_only(
+        pages_text=pages_text_map,
+        min_h=cfg.min_heading_len,
+        max_h=cfg.max_heading_len,
+    )
+
+    chunks = build_chunks_from_pages(
+        pages=pages,
+        target_chars=cfg.target_chars,
+        overlap_chars=cfg.overlap_chars,
+        section_paths_by_page=section_by_page,
+    )
+
+    # pre-tags; postprocess will refine
+    source = infer_source(title)
+    tags = auto_tags(title)
+
+    # JSONL layout: one header record with the section table, then one record per chunk.
+    # Chunks carry "section_id" (key into header["sections"]) instead of repeating the path.
+    out_jsonl = cfg.out_dir / "jsonl" / f"{doc_id}.jsonl"
+    section_table: Dict[Tuple[str, ...], int] = {}
+    lines: List[bytes] = []
+    for i, ch in enumerate(chunks):
+        path = tuple(_dedupe_adjacent(ch.section_path if isinstance(ch.section_path, list) else ["Document"]))
+        section_id = section_table.setdefault(path, len(section_table))
+        rec = {
+            "chunk_id": f"{doc_id}::c{i:05d}",
+            "doc_id": doc_id,
+            "source": source,
+            "title": title,
+            "file_name": pdf_path.name,
+            "page_start": ch.page_start,
+            "page_end": ch.page_end,
+            "section_id": section_id,
+            "tags": tags,
+            "text": ch.text,
+        }
+        lines.append(orjson.dumps(rec) + b"\n")  # UTF-8, no ASCII escaping
+
+    header = {
+        "_type": "header",
+        "doc_id": doc_id,
+        "sections": {str(sid): list(path) for path, sid in section_table.items()},
+    }
+
+    with out_jsonl.open("wb", buffering=1 << 20) as f:
+        f.write(orjson.dumps(header) + b"\n")
+        f.writelines(lines)
+
+    return {
+        "doc_id": doc_id,
+        "title": title,
+        "source": source,
+        "file_name": pdf_path.name,
+        "page_count": len(res.pages),
+        "kept_pages": len(pages),
+        "chunk_count": len(chunks),
+        "metadata": res.meta,
+        "notes": res.extraction_notes,
+        "jsonl_path": str(out_jsonl),
+    }
+
+
+def parse_all_pdfs(cfg: ParseConfig, force: bool = False) -> None:
     in_dir = cfg.input_dir
     out_dir = cfg.out_dir
     (out_dir / "jsonl").mkdir(parents=True, exist_ok=True)
@@ -90,78 +220,67 @@ def parse_all_pdfs(cfg: ParseConfig) -> None:
         "docs": [],
     }
 
-    for pdf_path in tqdm(pdfs, desc="Parsing PDFs"):
-        res = extract_pdf_text(pdf_path)
+    # Skip PDFs whose bytes and parse settings match the last run (unless --force)
+    # and whose JSONL is still on disk; their manifest entry is reused as-is.
+    cache_path = out_dir / "manifests" / "ingest_cache.json"
+    cache = {} if force else _load_ingest_cache(cache_path)
+    cfg_sig = _cfg_signature(cfg)
+
+    entries: Dict[Path, Dict[str, Any]] = {}
+    hashes: Dict[Path, str] = {}
+    todo: List[Path] = []
+    for pdf_path in pdfs:
         doc_id = _doc_id_from_path(pdf_path)
-        title = (res.title_guess or pdf_path.stem).strip()
-
-        pages: List[Tuple[int, str]] = [
-            (p.page_num, p.text)
-            for p in res.pages
-            if len((p.text or "").strip()) >= cfg.drop_tiny_pages_below_chars
-        ]
-        pages_text_map = {pno: txt for pno, txt in pages}
-
-        section_by_page = _build_section_paths_strict_heading_only(
-            pages_text=pages_text_map,
-            min_h=cfg.min_heading_len,
-            max_h=cfg.max_heading_len,
-        )
-
-        chunks = build_chunks_from_pages(
-            pages=pages,
-            target_chars=cfg.target_chars,
-            overlap_chars=cfg.overlap_chars,
-            section_paths_by_page=section_by_page,
-        )
-
-        # pre-tags; postprocess will refine
-        source = infer_source(title)
-        tags = auto_tags(title)
-
-        out_jsonl = out_dir / "jsonl" / f"{doc_id}.jsonl"
-        with out_jsonl.open("w", encoding="utf-8") as f:
-            for i, ch in enumerate(chunks):
-                rec = {
-                    "chunk_id": f"{doc_id}::c{i:05d}",
-                    "doc_id": doc_id,
-                    "source": source,
-                    "title": title,
-                    "file_name": pdf_path.name,
-                    "page_start": ch.page_start,
-                    "page_end": ch.page_end,
-                    "section_path": _dedupe_adjacent(ch.section_path if isinstance(ch.section_path, list) else ["Document"]),
-                    "tags": tags,
-                    "text": ch.text,
+        h = _file_hash(pdf_path)
+        hashes[pdf_path] = h
+        hit = cache.get(doc_id) or {}
+        if (
+            hit.get("sha") == h
+            and hit.get("cfg") == cfg_sig
+            and hit.get("entry")
+            and Path(hit.get("jsonl") or "").exists()
+        ):
+            entries[pdf_path] = hit["entry"]
+        else:
+            todo.append(pdf_path)
+
+    if entries:
+        print(f"✅ Unchanged PDFs skipped: {len(entries)} (use --force to re-parse)")
+
+    # PDFs are independent (own fitz doc, own JSONL): one per worker process.
+    if todo:
+        workers = max(1, min(cfg.max_workers or os.cpu_count() or 1, len(todo)))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for pdf_path, entry in tqdm(
+                zip(todo, ex.map(_process_one_pdf, todo, repeat(cfg))), total=len(todo), desc="Parsing PDFs"
+            ):
+                entries[pdf_path] = entry
+                cache[entry["doc_id"]] = {
+                    "sha": hashes[pdf_path],
+                    "cfg": cfg_sig,
+                    "jsonl": entry["jsonl_path"],
+                    "mtime": pdf_path.stat().st_mtime,
+                    "entry": entry,
                 }
-                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-        manifest["docs"].append(
-            {
-                "doc_id": doc_id,
-                "title": title,
-                "source": source,
-                "file_name": pdf_path.name,
-                "page_count": len(res.pages),
-                "kept_pages": len(pages),
-                "chunk_count": len(chunks),
-                "metadata": res.meta,
-                "notes": res.extraction_notes,
-                "jsonl_path": str(out_jsonl),
-            }
-        )
-
-    (out_dir / "manifests" / "docs_manifest.json").write_text(
-        json.dumps(manifest, indent=2, ensure_ascii=False),
-        encoding="utf-8",
+
+    # keep the manifest sorted by file name
+    manifest["docs"] = [entries[p] for p in pdfs]
+
+    (out_dir / "manifests" / "docs_manifest.json").write_bytes(
+        orjson.dumps(manifest, option=orjson.OPT_INDENT_2)
     )
+    cache_path.write_bytes(orjson.dumps(cache, option=orjson.OPT_INDENT_2))
 
     print("✅ Done. JSONL written to out/jsonl and manifest to out/manifests/docs_manifest.json")
 
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--force", action="store_true", help="re-parse every PDF, ignoring ingest_cache.json")
+    args = ap.parse_args()
+
     cfg = ParseConfig(
         input_dir=Path("data/pdfs"),
         out_dir=Path("out"),
     )
-    parse_all_pdfs(cfg)
+    parse_all_pdfs(cfg, force=args.force)
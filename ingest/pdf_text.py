@@ -1,16 +1,22 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict
 import re
 
 import fitz
 
-WHITESPACE_RE = re.compile(r"[ \t]+")
-LINEBREAKS_RE = re.compile(r"\n{3,}")
+# Only runs that actually change (tabs / 2+ blanks); single spaces are left alone
+WHITESPACE_RE = re.compile(r"[ \t]{2,}|\t")
+HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
 
-@dataclass
+# PyMuPDF "blocks" tuple: (x0, y0, x1, y1, text, block_no, block_type); type 0 = text
+TEXT_BLOCK = 0
+
+@dataclass(slots=True)
 class PageText:
     page_num: int  # 1-based
     text: str
@@ -25,31 +31,99 @@ class PdfExtractResult:
 
 def _clean_text(text: str) -> str:
     # normalize whitespace but keep line breaks (useful for headings)
+    # (blank-line runs can't occur: _page_text joins stripped blocks with single newlines)
     text = text.replace("\r", "\n")
     text = WHITESPACE_RE.sub(" ", text)
-    text = LINEBREAKS_RE.sub("\n\n", text)
     # remove isolated hyphen line breaks like "man-\nagement"
-    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    if "-\n" in text:
+        text = HYPHEN_BREAK_RE.sub(r"\1\2", text)
     return text.strip()
 
-def extract_pdf_text(path: Path) -> PdfExtractResult:
-    doc = fitz.open(path)
-    meta = {}
-    notes: List[str] = []
-    try:
-        m = doc.metadata or {}
-        for k, v in m.items():
-            if v:
-                meta[str(k)] = str(v)
-    except Exception as e:
-        notes.append(f"metadata_error: {e}")
+def _page_text(page, header_ratio: float, footer_ratio: float) -> str:
+    """
+    Page text from PyMuPDF text blocks, dropping blocks that sit entirely
+    in the header/footer bands (running titles, page numbers, watermarks).
+    """
+    height = float(page.rect.height or 0.0)
+    header_y = height * header_ratio
+    footer_y = height * (1.0 - footer_ratio)
+
+    parts: List[str] = []
+    for x0, y0, x1, y1, text, _block_no, block_type in page.get_text("blocks"):
+        if block_type != TEXT_BLOCK:
+            continue
+        if height and (y1 <= header_y or y0 >= footer_y):
+            continue
+        text = (text or "").strip()
+        if text:
+            parts.append(text)
+    return "\n".join(parts)
 
+def _extract_pages(
+    doc,
+    page_range: Tuple[int, int],
+    header_ratio: float,
+    footer_ratio: float,
+) -> List[PageText]:
+    start, stop = page_range
     pages: List[PageText] = []
-    for i in range(doc.page_count):
+    for i in range(start, stop):
         page = doc.load_page(i)
-        text = page.get_text("text") or ""
-        text = _clean_text(text)
+        text = _clean_text(_page_text(page, header_ratio, footer_ratio))
         pages.append(PageText(page_num=i + 1, text=text))
+    return pages
+
+def _extract_page_range(
+    path: Path,
+    page_range: Tuple[int, int],
+    header_ratio: float,
+    footer_ratio: float,
+) -> List[PageText]:
+    # Worker entry point: opens its own document, fitz objects must never be shared across processes
+    with fitz.open(path) as doc:
+        return _extract_pages(doc, page_range, header_ratio, footer_ratio)
+
+def extract_pdf_text(
+    path: Path,
+    header_ratio: float = 0.05,
+    footer_ratio: float = 0.05,
+    page_workers: int = 1,
+) -> PdfExtractResult:
+    """
+    page_workers > 1 splits the pages into contiguous ranges extracted in
+    separate processes (PyMuPDF is not thread-safe, so no threads here).
+    """
+    meta = {}
+    notes: List[str] = []
+    with fitz.open(path) as doc:
+        try:
+            m = doc.metadata or {}
+            for k, v in m.items():
+                if v:
+                    meta[str(k)] = str(v)
+        except Exception as e:
+            notes.append(f"metadata_error: {e}")
+
+        n = doc.page_count
+        workers = max(1, min(page_workers, n))
+        if workers == 1:
+            # reuse the open document; only worker processes reopen the file
+            pages = _extract_pages(doc, (0, n), header_ratio, footer_ratio)
+
+    if workers > 1:
+        step = -(-n // workers)  # ceil
+        ranges = [(start, min(start + step, n)) for start in range(0, n, step)]
+        pages = []
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            # map() returns ranges in order, so pages stay sorted by page_num
+            for part in ex.map(
+                _extract_page_range,
+                repeat(path),
+                ranges,
+                repeat(header_ratio),
+                repeat(footer_ratio),
+            ):
+                pages.extend(part)
 
     # title guess: metadata title > first non-empty line of page 1
     title_guess = meta.get("title", "").strip()
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-import json
+import os
 import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, List
+
+import orjson
 
 # Remove ASCII control chars + C1 control chars (the \x82 bullet issue lives here)
 CTRL_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]")
@@ -11,9 +16,16 @@ CTRL_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]")
 # Collapse multi-space / tabs
 MULTISPACE_RE = re.compile(r"[ \t]{2,}")
 
+# Bullet alone on its own line
+BULLET_LINE_RE = re.compile(r"\n[•]\s*\n")
+
+# output is accumulated and written in ~1MB slabs instead of once per record
+WRITE_CHUNK = 1 << 20
+
 BAD_TITLE_MARKERS = (
     "new doc", "newstarting", "microsoft word", ".doc", "starting content pages"
 )
+BAD_TITLE_RE = re.compile("|".join(re.escape(m) for m in BAD_TITLE_MARKERS))
 
 # Common broken bullets coming from PDF text extraction
 # \u0082 = the “\x82” bullet you saw
@@ -29,26 +41,40 @@ BULLET_NORMALIZE = {
 def clean_str(s: str) -> str:
     if not s:
         return ""
-    # 1) normalize common bullets BEFORE stripping controls (just in case)
-    for k, v in BULLET_NORMALIZE.items():
-        s = s.replace(k, v)
+    # 1) normalize common bullets BEFORE stripping controls (just in case),
+    #    then NFKC (ligatures, fullwidth forms, NBSP, ...). Both only touch
+    #    non-ASCII chars, and isascii() is O(1), so plain-ASCII text skips this.
+    if not s.isascii():
+        for k, v in BULLET_NORMALIZE.items():
+            s = s.replace(k, v)
+        s = unicodedata.normalize("NFKC", s)
 
     # 2) strip control chars including C1 range
     s = CTRL_RE.sub("", s)
 
-    # 3) normalize whitespace
-    s = MULTISPACE_RE.sub(" ", s)
+    # 3) normalize whitespace (the regex tries a match at every space; most
+    #    chunks have no tab / double space at all, so test that first)
+    if "\t" in s or "  " in s:
+        s = MULTISPACE_RE.sub(" ", s)
 
     # 4) normalize weird line-only bullet artifacts
-    s = re.sub(r"\n[•]\s*\n", "\n", s)
+    if "\n•" in s:
+        s = BULLET_LINE_RE.sub("\n", s)
 
     return s.strip()
 
+def _fast_clean(x: str) -> str:
+    # Section labels are short and usually already clean: printable ASCII has no
+    # bullets / control chars, so without a double space clean_str is just strip()
+    if x.isascii() and x.isprintable() and "  " not in x:
+        return x.strip()
+    return clean_str(x)
+
 def is_bad_title(title: str) -> bool:
     t = (title or "").strip().lower()
     if not t:
         return True
-    return any(m in t for m in BAD_TITLE_MARKERS)
+    return bool(BAD_TITLE_RE.search(t))
 
 def infer_source_from(filename: str, title: str, sample_text: str) -> str:
     f = (filename or "").lower()
@@ -90,26 +116,54 @@ def choose_better_title(filename: str, old_title: str, sample_text: str) -> str:
 
     return Path(filename).stem.replace("_", " ").strip()
 
+def clean_section_path(sp: Any) -> List[str]:
+    if isinstance(sp, list):
+        cleaned = [_fast_clean(str(x)) for x in sp]
+        cleaned = [x for x in cleaned if x]
+        # de-dup adjacent
+        dedup = []
+        for x in cleaned:
+            if not dedup or dedup[-1] != x:
+                dedup.append(x)
+        return dedup if dedup else ["Document"]
+    sps = clean_str(str(sp)) if sp else ""
+    return [sps] if sps else ["Document"]
+
+def is_header(rec: Dict[str, Any]) -> bool:
+    # parse_all writes one header record (section table) before the chunks
+    return rec.get("_type") == "header"
+
 def postprocess_one(in_path: Path, out_path: Path) -> Dict[str, Any]:
     count = 0
     sample_text = ""
     old_title = ""
     filename = in_path.name
 
-    # sample from first chunk
-    with in_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            rec = json.loads(line)
+    buf = bytearray()
+
+    with in_path.open("rb") as fin, out_path.open("wb", buffering=WRITE_CHUNK) as fout:
+        # sample from first chunk; records read before it (the header) are
+        # kept parsed and written once title/source are known
+        leading: List[Dict[str, Any]] = []
+        for line in fin:
+            rec = orjson.loads(line)
+            leading.append(rec)
+            if is_header(rec):
+                continue
             old_title = rec.get("title", "") or ""
             sample_text = rec.get("text", "") or ""
             break
 
-    fixed_title = choose_better_title(filename, old_title, sample_text)
-    fixed_source = infer_source_from(filename, fixed_title, sample_text)
+        fixed_title = choose_better_title(filename, old_title, sample_text)
+        fixed_source = infer_source_from(filename, fixed_title, sample_text)
 
-    with in_path.open("r", encoding="utf-8") as fin, out_path.open("w", encoding="utf-8") as fout:
-        for line in fin:
-            rec = json.loads(line)
+        for rec in chain(leading, map(orjson.loads, fin)):
+            if is_header(rec):
+                # clean each distinct section path once; chunks keep their section_id
+                rec["sections"] = {k: clean_section_path(v) for k, v in (rec.get("sections") or {}).items()}
+                buf += orjson.dumps(rec)
+                buf += b"\n"
+                continue
 
             rec["title"] = fixed_title
             rec["source"] = fixed_source
@@ -117,24 +171,20 @@ def postprocess_one(in_path: Path, out_path: Path) -> Dict[str, Any]:
             # clean text
             rec["text"] = clean_str(rec.get("text", ""))
 
-            # clean section_path
-            sp = rec.get("section_path", [])
-            if isinstance(sp, list):
-                cleaned = [clean_str(str(x)) for x in sp]
-                cleaned = [x for x in cleaned if x]
-                # de-dup adjacent
-                dedup = []
-                for x in cleaned:
-                    if not dedup or dedup[-1] != x:
-                        dedup.append(x)
-                rec["section_path"] = dedup if dedup else ["Document"]
-            else:
-                sps = clean_str(str(sp)) if sp else ""
-                rec["section_path"] = [sps] if sps else ["Document"]
-
-            fout.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            # clean section_path (older JSONL without a header/section_id)
+            if "section_id" not in rec:
+                rec["section_path"] = clean_section_path(rec.get("section_path", []))
+
+            buf += orjson.dumps(rec)  # UTF-8, no ASCII escaping
+            buf += b"\n"
             count += 1
 
+            if len(buf) > WRITE_CHUNK:
+                fout.write(buf)
+                buf.clear()
+
+        fout.write(buf)
+
     return {"in": str(in_path), "out": str(out_path), "chunks": count, "source": fixed_source, "title": fixed_title}
 
 def main() -> None:
@@ -143,14 +193,16 @@ def main() -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
     (Path("out/manifests")).mkdir(parents=True, exist_ok=True)
 
-    reports = []
-    for p in sorted(in_dir.glob("*.jsonl")):
-        out_p = out_dir / p.name.replace(".jsonl", "_clean.jsonl")
-        reports.append(postprocess_one(p, out_p))
+    in_paths = sorted(in_dir.glob("*.jsonl"))
+    out_paths = [out_dir / p.name.replace(".jsonl", "_clean.jsonl") for p in in_paths]
+
+    # files are independent: one per worker process; map() keeps report order
+    workers = max(1, min(os.cpu_count() or 1, len(in_paths)))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        reports = list(ex.map(postprocess_one, in_paths, out_paths))
 
-    (Path("out/manifests") / "postprocess_report.json").write_text(
-        json.dumps(reports, indent=2, ensure_ascii=False),
-        encoding="utf-8",
+    (Path("out/manifests") / "postprocess_report.json").write_bytes(
+        orjson.dumps(reports, option=orjson.OPT_INDENT_2)
     )
 
     print("✅ Clean JSONLs written to out/jsonl_clean/")
@@ -12,7 +12,13 @@ COLLECTION_NAME = "ayurveda_docs"              # ⚠️ change if your ingestion
 EMBED_MODEL = "text-embedding-3-small"    # must match ingestion
 LLM_MODEL = "gpt-4.1-mini"
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Streamlit re-runs this script on every interaction; a module-level OpenAI()
+# would open a fresh HTTP connection pool (TCP + TLS) each rerun. Share one.
+@st.cache_resource
+def get_openai_client():
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+client = get_openai_client()
 
 # =========================================================
 # STREAMLIT PAGE
@@ -62,10 +68,19 @@ ask = st.button("✨ Ask", use_container_width=True)
 # =========================================================
 # RETRIEVAL
 # =========================================================
+@st.cache_data(ttl=600, show_spinner=False)
+def _embed(q: str):
+    # embed with the ingest model (and its dimensions) instead of Chroma's default embedder
+    dims = (collection.metadata or {}).get("embed_dimensions")
+    kwargs = {"dimensions": dims} if dims else {}
+    return client.embeddings.create(model=EMBED_MODEL, input=[q], **kwargs).data[0].embedding
+
+
 def retrieve_chunks(query: str, k: int):
     results = collection.query(
-        query_texts=[query],
+        query_embeddings=[_embed(query)],
         n_results=k,
+        include=["documents", "metadatas"],
     )
 
     documents = results.get("documents", [[]])[0]
@@ -87,8 +102,16 @@ def retrieve_chunks(query: str, k: int):
 # GENERATION (STRICT RAG)
 # =========================================================
 def generate_answer(question: str, chunks: list, strict: bool):
+    # tuples -> hashable cache key; same question + same chunks = no new LLM call
+    chunk_ids = tuple(c["chunk_id"] for c in chunks)
+    chunk_texts = tuple(c["text"] for c in chunks)
+    return _cached_generate(question, chunk_ids, chunk_texts, strict)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_generate(question: str, chunk_ids: tuple, chunk_texts: tuple, strict: bool):
     context = "\n\n".join(
-        f"[{i+1}] {c['text']}" for i, c in enumerate(chunks)
+        f"[{i+1}] {text}" for i, text in enumerate(chunk_texts)
     )
 
     system_prompt = (
@@ -150,6 +173,8 @@ if ask:
     # -------------------------
     st.subheader("📌 Citations")
 
+    # one markdown element for all citations (one frontend delta instead of one per chunk)
+    parts = []
     for c in chunks:
         meta = c["meta"]
 
@@ -165,7 +190,7 @@ if ask:
         section = meta.get("section") or meta.get("chapter") or ""
         page = meta.get("page") or meta.get("verse") or ""
 
-        st.markdown(
+        parts.append(
             f"""
 **{title}**
 
@@ -176,3 +201,5 @@ if ask:
 - Chunk ID: `{c['chunk_id']}`
 """
         )
+
+    st.markdown("\n\n---\n\n".join(parts))
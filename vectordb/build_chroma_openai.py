@@ -1,35 +1,118 @@
 from __future__ import annotations
 
-import json
+import argparse
+import asyncio
+import hashlib
 import os
-import time
+import shutil
+import sqlite3
+from array import array
 from pathlib import Path
-from typing import Dict, Any, Iterable, List
+from typing import Dict, Any, Iterable, List, Optional, Protocol, Tuple
 
+import requests
 from dotenv import load_dotenv
 from tqdm import tqdm
 import os
 os.environ["ANONYMIZED_TELEMETRY"] = "0"
 
 import chromadb
+import orjson
 from chromadb.config import Settings
 
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+# Optional: read-only HNSW sidecar for the API (see write_hnsw_sidecar)
+try:
+    import hnswlib
+    import numpy as np
+except ImportError:
+    hnswlib = None
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 JSONL_DIR = PROJECT_ROOT / "out" / "jsonl_clean"
 CHROMA_DIR = PROJECT_ROOT / "chroma_db"
 COLLECTION_NAME = "ayurveda_docs"
+SIDECAR_DIR = CHROMA_DIR / "hnsw_sidecar"
+EMBED_CACHE_PATH = CHROMA_DIR / "embed_cache.sqlite"
 
 load_dotenv(PROJECT_ROOT / ".env")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 EMBED_MODEL = os.getenv("EMBEDDINGS_MODEL_NAME", "text-embedding-3-small").strip()
 
-if not OPENAI_API_KEY:
+# text-embedding-3-* can return shortened (Matryoshka) vectors; 0 = model default
+EMBED_DIMENSIONS = int(os.getenv("EMBED_DIMENSIONS", "512") or 0) or None
+
+# "openai" (default) or "infinity" (local michaelfeil/infinity server)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "openai").strip().lower()
+INFINITY_URL = os.getenv("INFINITY_URL", "http://localhost:7997").strip().rstrip("/")
+INFINITY_MODEL = os.getenv("INFINITY_MODEL", "BAAI/bge-small-en-v1.5").strip()
+
+if EMBED_BACKEND == "openai" and not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY missing in .env")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+aclient = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+
+# embedding batches in flight at once (the build is round-trip bound, not CPU bound)
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "8"))
+
+
+class Embedder(Protocol):
+    name: str
+    model: str
+    dimensions: Optional[int]
+    batch_size: int
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]: ...
+
+
+class OpenAIEmbedder:
+    name = "openai"
+    batch_size = 256  # chunks are ~2.2k chars; far below the per-request token cap
+
+    def __init__(self, model: str, dimensions: Optional[int] = None):
+        self.model = model
+        self.dimensions = dimensions
+        self.kwargs: Dict[str, Any] = {"dimensions": dimensions} if dimensions else {}
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        resp = await aclient.embeddings.create(model=self.model, input=texts, **self.kwargs)
+        return [d.embedding for d in resp.data]
+
+
+class InfinityEmbedder:
+    """
+    Local Infinity server (OpenAI-compatible POST /embeddings).
+    Big batches keep the GPU busy; one pooled HTTP session for the whole build.
+    """
+
+    name = "infinity"
+    dimensions = None  # whatever the served model produces
+    batch_size = 128
+
+    def __init__(self, base_url: str, model: str):
+        self.url = f"{base_url}/embeddings"
+        self.model = model
+        self.session = requests.Session()
+
+    def _post(self, texts: List[str]) -> List[List[float]]:
+        r = self.session.post(self.url, json={"model": self.model, "input": texts}, timeout=120)
+        r.raise_for_status()
+        data = sorted(r.json()["data"], key=lambda d: d.get("index", 0))
+        return [d["embedding"] for d in data]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        # requests is blocking; run it in a worker thread
+        return await asyncio.to_thread(self._post, texts)
+
+
+def make_embedder() -> Embedder:
+    if EMBED_BACKEND == "infinity":
+        return InfinityEmbedder(INFINITY_URL, INFINITY_MODEL)
+    if EMBED_BACKEND == "openai":
+        return OpenAIEmbedder(EMBED_MODEL, EMBED_DIMENSIONS)
+    raise ValueError(f"Unknown EMBED_BACKEND={EMBED_BACKEND!r} (use openai|infinity)")
 
 
 def iter_jsonl_files() -> List[Path]:
@@ -40,15 +123,22 @@ def iter_jsonl_files() -> List[Path]:
 
 
 def load_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
+    with path.open("rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            yield json.loads(line)
+            yield orjson.loads(line)
+
+
+def section_path_of(rec: Dict[str, Any], sections: Dict[str, List[str]]) -> List[str]:
+    # New JSONL: "section_id" into the file's header table; older files inline "section_path"
+    if "section_id" in rec:
+        return sections.get(str(rec["section_id"])) or []
+    return rec.get("section_path") or []
 
 
-def make_metadata(rec: Dict[str, Any]) -> Dict[str, Any]:
+def make_metadata(rec: Dict[str, Any], sections: Dict[str, List[str]]) -> Dict[str, Any]:
     return {
         "doc_id": rec.get("doc_id"),
         "file_name": rec.get("file_name"),
@@ -56,36 +146,208 @@ def make_metadata(rec: Dict[str, Any]) -> Dict[str, Any]:
         "source": rec.get("source"),
         "page_start": int(rec.get("page_start", 0) or 0),
         "page_end": int(rec.get("page_end", 0) or 0),
-        "section": " > ".join(rec.get("section_path") or []),
+        "section": " > ".join(section_path_of(rec, sections)),
         "tags": ",".join(rec.get("tags") or []),
     }
 
 
-def embed_texts(texts: List[str], max_retries: int = 6) -> List[List[float]]:
+async def embed_texts(embedder: Embedder, texts: List[str], max_retries: int = 6) -> List[List[float]]:
     """
     Robust embeddings with retry/backoff.
     """
     delay = 1.0
     for attempt in range(max_retries):
         try:
-            resp = client.embeddings.create(
-                model=EMBED_MODEL,
-                input=texts,
-            )
-            return [d.embedding for d in resp.data]
+            return await embedder.aembed(texts)
         except Exception as e:
             if attempt == max_retries - 1:
                 raise
-            time.sleep(delay)
+            await asyncio.sleep(delay)
             delay = min(delay * 2, 20.0)
 
 
+class EmbeddingCache:
+    """
+    On-disk text -> embedding cache (SQLite), so rebuilds only pay for new/changed chunks.
+    Key = sha256(backend, model, dimensions, text); value = float32 bytes.
+    """
+
+    def __init__(self, path: Path, embedder: Embedder):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        self.db.execute("CREATE TABLE IF NOT EXISTS cache(k TEXT PRIMARY KEY, v BLOB)")
+        self.prefix = f"{embedder.name}\0{embedder.model}\0{embedder.dimensions or ''}\0".encode("utf-8")
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(self.prefix + text.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        for part in batch(keys, 500):  # stay under SQLite's bound-parameter limit
+            rows = self.db.execute(
+                f"SELECT k, v FROM cache WHERE k IN ({','.join('?' * len(part))})", part
+            )
+            for k, v in rows:
+                found[k] = array("f", v).tolist()
+        return found
+
+    def put_many(self, items: List[Tuple[str, List[float]]]) -> None:
+        with self.db:  # one transaction per batch
+            self.db.executemany(
+                "INSERT OR REPLACE INTO cache(k, v) VALUES (?, ?)",
+                [(k, array("f", v).tobytes()) for k, v in items],
+            )
+
+    def close(self) -> None:
+        self.db.close()
+
+
+async def cached_embed_texts(embedder: Embedder, cache: EmbeddingCache, texts: List[str]) -> List[List[float]]:
+    """
+    embed_texts() for cache misses only; results in input order.
+    """
+    keys = [cache.key(t) for t in texts]
+    found = cache.get_many(keys)
+    miss = [i for i, k in enumerate(keys) if k not in found]
+    if miss:
+        fresh = await embed_texts(embedder, [texts[i] for i in miss])
+        cache.put_many([(keys[i], e) for i, e in zip(miss, fresh)])
+        found.update((keys[i], e) for i, e in zip(miss, fresh))
+    return [found[k] for k in keys]
+
+
 def batch(lst: List[Any], n: int) -> Iterable[List[Any]]:
     for i in range(0, len(lst), n):
         yield lst[i : i + n]
 
 
-def main() -> None:
+def quantize_int8(vecs: "np.ndarray") -> "Tuple[np.ndarray, np.ndarray]":
+    """
+    Symmetric per-vector int8: v ~= q * scale, scale = max|v| / 127.
+    Rows are L2-normalized first so q_i . q_j * s_i * s_j ~= cosine.
+    """
+    vecs = vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+    scale = np.abs(vecs).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.round(vecs / scale[:, None]).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def write_hnsw_sidecar(
+    ids: List[str],
+    docs: List[str],
+    metas: List[Dict[str, Any]],
+    embs: List[List[float]],
+) -> None:
+    """
+    Persist a plain hnswlib index next to Chroma so the API can answer
+    queries without going through Chroma's Python query path:
+      index.bin   - hnswlib cosine index, label i == row i
+      chunks.json - {"dim", "ids", "documents", "metadatas"} in label order
+      vectors_i8.npy / scales.npy - int8 copy of the embeddings (row i == label i)
+    """
+    if hnswlib is None or not ids:
+        # a sidecar from an older build would no longer match the collection
+        shutil.rmtree(SIDECAR_DIR, ignore_errors=True)
+        if hnswlib is None:
+            print("⚠️ hnswlib/numpy not installed; skipping HNSW sidecar")
+        return
+
+    SIDECAR_DIR.mkdir(parents=True, exist_ok=True)
+    vecs = np.asarray(embs, dtype=np.float32)
+    index = hnswlib.Index(space="cosine", dim=vecs.shape[1])
+    index.init_index(max_elements=len(ids), ef_construction=200, M=16)
+    index.add_items(vecs, np.arange(len(ids)))
+    index.save_index(str(SIDECAR_DIR / "index.bin"))
+
+    q8, scales = quantize_int8(vecs)
+    np.save(SIDECAR_DIR / "vectors_i8.npy", q8)
+    np.save(SIDECAR_DIR / "scales.npy", scales)
+
+    (SIDECAR_DIR / "chunks.json").write_bytes(
+        orjson.dumps({"dim": int(vecs.shape[1]), "ids": ids, "documents": docs, "metadatas": metas})
+    )
+    print(f"✅ HNSW sidecar: {SIDECAR_DIR}")
+
+
+async def embed_and_index(
+    embedder: Embedder,
+    col: Any,
+    ids: List[str],
+    docs: List[str],
+    metas: List[Dict[str, Any]],
+    resume: bool = False,
+) -> List[List[float]]:
+    """
+    Keep up to EMBED_CONCURRENCY batches in flight; this coroutine is the
+    single writer that adds each finished batch to Chroma.
+    With resume=True, chunks already in the collection are not re-embedded
+    or re-added (their stored embeddings are reused for the sidecar).
+    Returns embeddings in `ids` order (for the sidecar).
+    """
+    cache = EmbeddingCache(EMBED_CACHE_PATH, embedder)
+    sem = asyncio.Semaphore(EMBED_CONCURRENCY)
+
+    async def embed_batch(start: int, stop: int) -> Tuple[int, int, Optional[List[int]], List[List[float]], Dict[str, Any]]:
+        async with sem:
+            have: Dict[str, Any] = {}
+            if resume:
+                got = await asyncio.to_thread(col.get, ids=ids[start:stop], include=["embeddings"])
+                have = dict(zip(got["ids"], got["embeddings"]))
+            if have:
+                todo: Optional[List[int]] = [i for i in range(start, stop) if ids[i] not in have]
+                texts = [docs[i] for i in todo]
+            else:
+                todo = None  # the whole slice
+                texts = docs[start:stop]
+            embs = await cached_embed_texts(embedder, cache, texts) if texts else []
+            return start, stop, todo, embs, have
+
+    BATCH = embedder.batch_size
+    tasks = [
+        asyncio.create_task(embed_batch(start, min(start + BATCH, len(ids))))
+        for start in range(0, len(ids), BATCH)
+    ]
+
+    all_embs: List[Any] = [None] * len(ids)
+    try:
+        for fut in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Embedding+Indexing"):
+            start, stop, todo, embs, have = await fut
+            if todo is None:
+                b_ids = ids[start:stop]
+                b_docs = docs[start:stop]
+                b_meta = metas[start:stop]
+                all_embs[start:stop] = embs
+            else:
+                # resumed batch: some chunks are already in the collection
+                for i in range(start, stop):
+                    if ids[i] in have:
+                        all_embs[i] = have[ids[i]]
+                if not todo:
+                    continue
+                b_ids = [ids[i] for i in todo]
+                b_docs = [docs[i] for i in todo]
+                b_meta = [metas[i] for i in todo]
+                for i, e in zip(todo, embs):
+                    all_embs[i] = e
+
+            # Chroma is sync; keep the loop free for the other batches
+            await asyncio.to_thread(
+                col.add,
+                ids=b_ids,
+                documents=b_docs,
+                metadatas=b_meta,
+                embeddings=embs,
+            )
+    finally:
+        for t in tasks:
+            t.cancel()
+        cache.close()
+
+    return all_embs
+
+
+def main(resume: bool = False) -> None:
     if not JSONL_DIR.exists():
         raise FileNotFoundError(f"Missing: {JSONL_DIR}")
 
@@ -93,53 +355,65 @@ def main() -> None:
     print(f"✅ JSONL_DIR: {JSONL_DIR}")
     print(f"✅ CHROMA_DIR: {CHROMA_DIR}")
     print(f"✅ COLLECTION: {COLLECTION_NAME}")
-    print(f"✅ OPENAI EMBED MODEL: {EMBED_MODEL}")
+    embedder = make_embedder()
+    print(f"✅ EMBED BACKEND: {embedder.name} ({embedder.model}, dims={embedder.dimensions or 'default'})")
 
     chroma = chromadb.PersistentClient(
         path=str(CHROMA_DIR),
         settings=Settings(anonymized_telemetry=False),
     )
 
-    # Clean rebuild (recommended for first stable index)
-    existing = [c.name for c in chroma.list_collections()]
-    if COLLECTION_NAME in existing:
-        chroma.delete_collection(COLLECTION_NAME)
+    # embed_* lets query-side code embed with the same model / dimensions
+    col_meta: Dict[str, Any] = {"hnsw:space": "cosine", "embed_backend": embedder.name, "embed_model": embedder.model}
+    if embedder.dimensions:
+        col_meta["embed_dimensions"] = int(embedder.dimensions)
 
-    col = chroma.create_collection(
-        name=COLLECTION_NAME,
-        metadata={"hnsw:space": "cosine"},
-    )
+    existing = [c.name for c in chroma.list_collections()]
+    if resume and COLLECTION_NAME in existing:
+        # Resume an interrupted build: keep what's indexed, add the rest
+        col = chroma.get_collection(COLLECTION_NAME)
+        old = col.metadata or {}
+        for k in ("embed_backend", "embed_model", "embed_dimensions"):
+            if old.get(k) != col_meta.get(k):
+                raise RuntimeError(f"Can't resume: collection has {k}={old.get(k)!r}, build uses {col_meta.get(k)!r}")
+        print(f"✅ Resuming: {col.count()} chunks already indexed")
+    else:
+        # Clean rebuild (recommended for first stable index)
+        if COLLECTION_NAME in existing:
+            chroma.delete_collection(COLLECTION_NAME)
+        # the old sidecar belongs to the deleted collection; don't let the API
+        # serve it if this build fails before write_hnsw_sidecar
+        shutil.rmtree(SIDECAR_DIR, ignore_errors=True)
+
+        col = chroma.create_collection(
+            name=COLLECTION_NAME,
+            metadata=col_meta,
+        )
 
     ids: List[str] = []
     docs: List[str] = []
     metas: List[Dict[str, Any]] = []
+    seen: set = set()  # duplicate chunk_ids would make col.add fail mid-build
 
     for fp in files:
+        sections: Dict[str, List[str]] = {}
         for rec in load_jsonl(fp):
+            if rec.get("_type") == "header":
+                sections = rec.get("sections") or {}
+                continue
             txt = (rec.get("text") or "").strip()
             cid = (rec.get("chunk_id") or "").strip()
-            if not txt or not cid:
+            if not txt or not cid or cid in seen:
                 continue
+            seen.add(cid)
             ids.append(cid)
             docs.append(txt)
-            metas.append(make_metadata(rec))
+            metas.append(make_metadata(rec, sections))
 
     print(f"📦 Total chunks: {len(ids)}")
 
-    BATCH = 96  # safe batch size; can bump later
-    for idxs in tqdm(list(batch(list(range(len(ids))), BATCH)), desc="Embedding+Indexing"):
-        b_ids = [ids[i] for i in idxs]
-        b_docs = [docs[i] for i in idxs]
-        b_meta = [metas[i] for i in idxs]
-
-        embs = embed_texts(b_docs)
-
-        col.add(
-            ids=b_ids,
-            documents=b_docs,
-            metadatas=b_meta,
-            embeddings=embs,
-        )
+    all_embs = asyncio.run(embed_and_index(embedder, col, ids, docs, metas, resume=resume))
+    write_hnsw_sidecar(ids, docs, metas, all_embs)
 
     print("✅ DONE.")
     print(f"✅ Indexed chunks: {col.count()}")
@@ -147,4 +421,7 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resume", action="store_true", help="keep the existing collection and only add missing chunks")
+    args = ap.parse_args()
+    main(resume=args.resume)
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import atexit
 import os
+import pickle
+import sys
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional, Tuple
 
+import numpy as np
 from dotenv import load_dotenv
 import os
 os.environ["ANONYMIZED_TELEMETRY"] = "0"
@@ -15,6 +20,8 @@ from openai import OpenAI
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 CHROMA_DIR = PROJECT_ROOT / "chroma_db"
 COLLECTION_NAME = "ayurveda_docs"
+QUERY_CACHE_PATH = CHROMA_DIR / "query_cache.pkl"
+QUERY_CACHE_MAX = 1024
 
 load_dotenv(PROJECT_ROOT / ".env")
 
@@ -26,14 +33,52 @@ if not OPENAI_API_KEY:
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# set from the collection metadata in main(); queries must match the build's dimensions
+EMBED_DIMENSIONS: Optional[int] = None
 
-def embed_query(q: str) -> List[float]:
-    resp = client.embeddings.create(model=EMBED_MODEL, input=[q])
-    return resp.data[0].embedding
 
+# (model, dimensions, query) -> embedding, least recently used first;
+# capped at QUERY_CACHE_MAX and persisted across sessions in QUERY_CACHE_PATH
+_query_cache: "OrderedDict[Tuple[str, Optional[int], str], Tuple[float, ...]]" = OrderedDict()
 
-def format_hit(i: int, doc: str, meta: Dict[str, Any], dist: float) -> str:
-    sim = 1.0 - float(dist)
+
+def load_query_cache() -> None:
+    try:
+        with QUERY_CACHE_PATH.open("rb") as f:
+            saved = pickle.load(f)
+        _query_cache.update(list(saved.items())[-QUERY_CACHE_MAX:])
+    except Exception:
+        # missing, truncated or from an incompatible version: start empty
+        _query_cache.clear()
+
+
+def save_query_cache() -> None:
+    tmp = QUERY_CACHE_PATH.with_suffix(".tmp")
+    try:
+        with tmp.open("wb") as f:
+            pickle.dump(dict(_query_cache), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, QUERY_CACHE_PATH)
+    except OSError:
+        pass
+
+
+def embed_query(q: str) -> Tuple[float, ...]:
+    key = (EMBED_MODEL, EMBED_DIMENSIONS, q)
+    hit = _query_cache.get(key)
+    if hit is not None:
+        _query_cache.move_to_end(key)
+        return hit
+
+    kwargs: Dict[str, Any] = {"dimensions": EMBED_DIMENSIONS} if EMBED_DIMENSIONS else {}
+    resp = client.embeddings.create(model=EMBED_MODEL, input=[q], **kwargs)
+    emb = tuple(resp.data[0].embedding)  # immutable, safe to hand out from the cache
+    _query_cache[key] = emb
+    if len(_query_cache) > QUERY_CACHE_MAX:
+        _query_cache.popitem(last=False)
+    return emb
+
+
+def format_hit(i: int, doc: str, meta: Dict[str, Any], sim: float) -> str:
     return (
         f"\n--- HIT {i} | sim≈{sim:.4f} ---\n"
         f"{meta.get('source')} | {meta.get('title')} | {meta.get('file_name')}\n"
@@ -53,6 +98,12 @@ def main() -> None:
     )
     col = chroma.get_collection(COLLECTION_NAME)
 
+    global EMBED_DIMENSIONS
+    EMBED_DIMENSIONS = (col.metadata or {}).get("embed_dimensions")
+
+    load_query_cache()
+    atexit.register(save_query_cache)
+
     print("✅ Ready. Ask questions. Blank to exit.\n")
     while True:
         q = input("Q> ").strip()
@@ -61,7 +112,7 @@ def main() -> None:
 
         q_emb = embed_query(q)
         res = col.query(
-            query_embeddings=[q_emb],
+            query_embeddings=[list(q_emb)],
             n_results=10,
             include=["documents", "metadatas", "distances"],
         )
@@ -70,10 +121,16 @@ def main() -> None:
         metas = res["metadatas"][0]
         dists = res["distances"][0]
 
-        print("\n================ RESULTS ================\n")
-        for i, (d, m, dist) in enumerate(zip(docs, metas, dists), start=1):
-            print(format_hit(i, d, m, dist))
-        print("========================================\n")
+        # all similarities at once, then one write for the whole block
+        sims = 1.0 - np.asarray(dists, dtype=np.float64)
+        hits = "".join(
+            format_hit(i, d, m, s) + "\n" for i, (d, m, s) in enumerate(zip(docs, metas, sims), start=1)
+        )
+        sys.stdout.write(
+            "\n================ RESULTS ================\n\n"
+            + hits
+            + "========================================\n\n"
+        )
 
 
 if __name__ == "__main__":